@@ -1,3 +1,5 @@
+import re
+
 import dsp
 import dspy
 from dspy.signatures.signature import ensure_signature
@@ -23,6 +25,9 @@ class ReAct(Module):
 
         assert len(self.output_fields) == 1, "ReAct only supports one output field."
 
+        reserved = {"trajectory", "Thought", "Action"} & {*self.input_fields, *self.output_fields}
+        assert not reserved, f"ReAct reserves the field names {sorted(reserved)}; rename them in your signature."
+
         inputs_ = ", ".join([f"`{k}`" for k in self.input_fields.keys()])
         outputs_ = ", ".join([f"`{k}`" for k in self.output_fields.keys()])
 
@@ -45,75 +50,108 @@ class ReAct(Module):
             )
 
         instr = "\n".join(instr)
-        self.react = [
-            Predict(dspy.Signature(self._generate_signature(i), instr))
-            for i in range(1, max_iters + 1)
-        ]
+        self.react = Predict(dspy.Signature(self._generate_signature(), instr))
 
-    def _generate_signature(self, iters):
-        signature_dict = {}
-        for key, val in self.input_fields.items():
-            signature_dict[key] = val
+    def _generate_signature(self):
+        signature_dict = dict(self.input_fields)
 
-        for j in range(1, iters + 1):
-            signature_dict[f"Thought_{j}"] = dspy.OutputField(
-                prefix=f"Thought {j}:",
-                desc="next steps to take based on last observation",
-            )
+        signature_dict["trajectory"] = dspy.InputField(
+            prefix="Trajectory:",
+            desc="past Thought, Action, and Observation steps",
+            format=self._format_trajectory,
+        )
 
-            tool_list = " or ".join(
-                [
-                    f"{tool.name}[{tool.input_variable}]"
-                    for tool in self.tools.values()
-                    if tool.name != "Finish"
-                ],
-            )
-            signature_dict[f"Action_{j}"] = dspy.OutputField(
-                prefix=f"Action {j}:",
-                desc=f"always either {tool_list} or, when done, Finish[answer]",
-            )
+        signature_dict["Thought"] = dspy.OutputField(
+            prefix="Thought:",
+            desc="next steps to take based on last observation",
+        )
 
-            if j < iters:
-                signature_dict[f"Observation_{j}"] = dspy.OutputField(
-                    prefix=f"Observation {j}:",
-                    desc="observations based on action",
-                    format=dsp.passages2text,
-                )
+        tool_list = " or ".join(
+            [
+                f"{tool.name}[{tool.input_variable}]"
+                for tool in self.tools.values()
+                if tool.name != "Finish"
+            ],
+        )
+        signature_dict["Action"] = dspy.OutputField(
+            prefix="Action:",
+            desc=f"always either {tool_list} or, when done, Finish[answer]",
+        )
 
         return signature_dict
 
-    def act(self, output, hop):
+    @staticmethod
+    def _format_trajectory(trajectory):
+        if isinstance(trajectory, str):
+            return trajectory
+
+        if len(trajectory) == 0:
+            return "N/A"
+
+        steps = []
+        for idx, (thought, action, observation) in enumerate(trajectory, start=1):
+            observation = dsp.passages2text(observation or [])
+            separator = "\n" if "\n" in observation else " "
+            steps.append(
+                f"Thought {idx}: {thought}\n"
+                f"Action {idx}: {action}\n"
+                f"Observation {idx}:{separator}{observation}",
+            )
+
+        return "\n\n".join(steps)
+
+    def act(self, output):
         try:
-            action = output[f"Action_{hop+1}"]
-            action_name, action_val = action.strip().split("\n")[0].split("[", 1)
-            action_val = action_val.rsplit("]", 1)[0]
+            # Only the first line of the action is meaningful; everything is
+            # parsed with single-pass partitions over that line.
+            action = output["Action"].strip().partition("\n")[0]
+            action_name, bracket, action_val = action.partition("[")
+            if not bracket:
+                raise ValueError(f"Action is missing '[': {action}")
+
+            head, bracket, _ = action_val.rpartition("]")
+            if bracket:
+                action_val = head
 
             if action_name == "Finish":
                 return action_val
 
-            try:
-                output[f"Observation_{hop+1}"] = self.tools[action_name](action_val).passages
-            except AttributeError:
-                # Handle the case where 'passages' attribute is missing
-                # TODO: This is a hacky way to handle this. Need to fix this.
-                output[f"Observation_{hop+1}"] = self.tools[action_name](action_val)
+            observation = self.tools[action_name](action_val)
+            # Handle the case where 'passages' attribute is missing
+            # TODO: This is a hacky way to handle this. Need to fix this.
+            output["Observation"] = getattr(observation, "passages", observation)
 
         except Exception as e:
-            output[f"Observation_{hop+1}"] = (
+            output["Observation"] = (
                 "Failed to parse action. Bad formatting or incorrect action name."
             )
             raise e
 
+    def _check_legacy_state(self, state, prefix=""):
+        """Raise if `state` holds per-hop `react[i]` predictors saved by an older ReAct at `prefix`."""
+        pattern = re.compile(re.escape(f"{prefix}.react[" if prefix else "react[") + r"\d+\]")
+        legacy_keys = [name for name in state if pattern.fullmatch(name)]
+        if legacy_keys:
+            raise ValueError(
+                f"Cannot load ReAct state with per-hop predictors {legacy_keys}. ReAct now uses a single "
+                "`react` predictor with a `trajectory` input, so this program must be re-compiled.",
+            )
+
     def forward(self, **kwargs):
         args = {key: kwargs[key] for key in self.input_fields.keys() if key in kwargs}
 
-        for hop in range(self.max_iters):
+        # A single predictor sees the whole trajectory as one input, so the
+        # instructions and format stay identical across hops.
+        trajectory = []
+
+        for _ in range(self.max_iters):
             # with dspy.settings.context(show_guidelines=(i <= 2)):
-            output = self.react[hop](**args)
+            output = self.react(**args, trajectory=trajectory)
 
-            if action_val := self.act(output, hop):
+            if action_val := self.act(output):
                 break
-            args.update(output)
+            # An empty Finish[] doesn't end the loop and has no observation.
+            trajectory = [*trajectory, (output["Thought"], output["Action"], output.get("Observation"))]
 
         # assumes only 1 output field for now - TODO: handling for multiple output fields
         return dspy.Prediction(**{list(self.output_fields.keys())[0]: action_val or ""})
@@ -71,6 +71,12 @@ class BaseModule:
         return {name: param.dump_state() for name, param in self.named_parameters()}
 
     def load_state(self, state):
+        from dspy.predict.react import ReAct
+
+        # ReAct may sit anywhere in the program, so check for its legacy layout before any lookups.
+        for name, module in self.named_sub_modules(ReAct):
+            module._check_legacy_state(state, prefix=name[5:])
+
         for name, param in self.named_parameters():
             param.load_state(state[name])
 
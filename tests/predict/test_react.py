@@ -1,3 +1,5 @@
+import pytest
+
 import dspy
 from dspy.utils.dummies import dummy_rm
 
@@ -6,8 +8,8 @@ def test_example_no_tools():
     # Createa a simple dataset which the model will use with the Retrieve tool.
     lm = dspy.utils.DummyLM(
         [
-            "Initial thoughts",  # Thought_1
-            "Finish[blue]",  # Action_1
+            "Initial thoughts",  # Thought (hop 1)
+            "Finish[blue]",  # Action (hop 1)
         ]
     )
     dspy.settings.configure(lm=lm, rm=dummy_rm())
@@ -30,9 +32,10 @@ def test_example_no_tools():
         print("---")
 
     assert lm.get_convo(-1).endswith(
-        "Question: What is the color of the sky?\n"
-        "Thought 1: Initial thoughts\n"
-        "Action 1: Finish[blue]"
+        "Question: What is the color of the sky?\n\n"
+        "Trajectory: N/A\n\n"
+        "Thought: Initial thoughts\n\n"
+        "Action: Finish[blue]"
     )
 
 
@@ -40,10 +43,10 @@ def test_example_search():
     # Createa a simple dataset which the model will use with the Retrieve tool.
     lm = dspy.utils.DummyLM(
         [
-            "Initial thoughts",  # Thought_1
-            "Search[the color of the sky]",  # Thought_1
-            "More thoughts",  # Thought_2
-            "Finish[blue]",  # Action_2
+            "Initial thoughts",  # Thought (hop 1)
+            "Search[the color of the sky]",  # Action (hop 1)
+            "More thoughts",  # Thought (hop 2)
+            "Finish[blue]",  # Action (hop 2)
         ]
     )
     rm = dummy_rm(
@@ -75,12 +78,141 @@ def test_example_search():
 
     assert lm.get_convo(-1).endswith(
         "Question: What is the color of the sky?\n\n"
-        "Thought 1: Initial thoughts\n\n"
-        "Action 1: Search[the color of the sky]\n\n"
+        "Trajectory:\n"
+        "Thought 1: Initial thoughts\n"
+        "Action 1: Search[the color of the sky]\n"
         "Observation 1:\n"
         "[1] «We all know the color of the sky is blue.»\n"
         "[2] «Somethng about the sky colors»\n"
         "[3] «This sentence is completely irellevant to answer the question.»\n\n"
-        "Thought 2: More thoughts\n\n"
-        "Action 2: Finish[blue]"
+        "Thought: More thoughts\n\n"
+        "Action: Finish[blue]"
+    )
+
+    # All hops go through the same predictor, so the prompt prefix is shared.
+    assert len(program.predictors()) == 1
+    assert lm.history[0]["prompt"].split("Trajectory: N/A")[0] == lm.history[-1]["prompt"].split("Trajectory:\n")[0]
+
+
+def test_reserved_field_names():
+    with pytest.raises(AssertionError, match="trajectory"):
+        dspy.ReAct("question, trajectory -> answer")
+
+
+def test_load_legacy_state():
+    program = dspy.ReAct("question -> answer")
+    legacy_state = {f"react[{i}]": program.react.dump_state() for i in range(2)}
+
+    with pytest.raises(ValueError, match="per-hop predictors"):
+        program.load_state(legacy_state)
+
+    program.load_state(program.dump_state())
+
+
+def test_load_legacy_state_nested():
+    class Agent(dspy.Module):
+        def __init__(self):
+            super().__init__()
+            self.agent = dspy.ReAct("question -> answer")
+
+    program = Agent()
+    legacy_state = {f"agent.react[{i}]": program.agent.react.dump_state() for i in range(2)}
+
+    with pytest.raises(ValueError, match="per-hop predictors"):
+        program.load_state(legacy_state)
+
+    program.load_state(program.dump_state())
+
+
+def test_empty_finish_continues():
+    lm = dspy.utils.DummyLM(["t", "Finish[]", "t2", "Finish[x]"])
+    dspy.settings.configure(lm=lm, rm=dummy_rm())
+
+    result = dspy.ReAct("question -> answer")(question="What is the color of the sky?")
+    assert result.answer == "x"
+    assert lm.get_convo(-1).endswith(
+        "Trajectory:\n"
+        "Thought 1: t\n"
+        "Action 1: Finish[]\n"
+        "Observation 1: N/A\n\n"
+        "Thought: t2\n\n"
+        "Action: Finish[x]"
     )
+
+
+class _NoneTool:
+    name = "Lookup"
+    input_variable = "term"
+    desc = "looks up a term and returns nothing"
+
+    def __call__(self, term):
+        return None
+
+
+def test_action_without_observation():
+    lm = dspy.utils.DummyLM(["t", "Lookup[sky]", "t2", "Finish[blue]"])
+    dspy.settings.configure(lm=lm)
+
+    result = dspy.ReAct("question -> answer", tools=[_NoneTool()])(question="What is the color of the sky?")
+    assert result.answer == "blue"
+    assert "Action 1: Lookup[sky]\nObservation 1: N/A" in lm.get_convo(-1)
+
+
+class _EchoTool:
+    name = "Search"
+    input_variable = "query"
+    desc = "records each query and returns it without a passages attribute"
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        return [f"result for {query}"]
+
+
+@pytest.mark.parametrize(
+    "action, expected",
+    [
+        ("Finish[blue]\nsome trailing explanation", "blue"),
+        ("Finish[blue", "blue"),
+        ("Finish[a[b]]", "a[b]"),
+    ],
+)
+def test_act_finish_parsing(action, expected):
+    program = dspy.ReAct("question -> answer", tools=[_EchoTool()])
+    assert program.act(dspy.Prediction(Action=action)) == expected
+
+
+def test_act_nested_brackets_tool_call():
+    tool = _EchoTool()
+    program = dspy.ReAct("question -> answer", tools=[tool])
+    output = dspy.Prediction(Action="Search[a[b]]")
+
+    assert program.act(output) is None
+    assert tool.queries == ["a[b]"]
+    # The tool result has no `.passages`, so it is used as-is.
+    assert output["Observation"] == ["result for a[b]"]
+
+
+def test_act_missing_open_bracket():
+    program = dspy.ReAct("question -> answer", tools=[_EchoTool()])
+    output = dspy.Prediction(Action="Finish blue")
+
+    with pytest.raises(ValueError, match="missing '\\['"):
+        program.act(output)
+    assert output["Observation"].startswith("Failed to parse action.")
+
+
+def test_act_tool_attribute_error_propagates():
+    class _BrokenTool(_EchoTool):
+        def __call__(self, query):
+            self.queries.append(query)
+            raise AttributeError("broken tool")
+
+    tool = _BrokenTool()
+    program = dspy.ReAct("question -> answer", tools=[tool])
+
+    with pytest.raises(AttributeError, match="broken tool"):
+        program.act(dspy.Prediction(Action="Search[sky]"))
+    assert tool.queries == ["sky"]